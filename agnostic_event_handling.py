@@ -65,28 +65,40 @@ class Const:
         NA = "N/A"
 
 
+# compiled once, sanitize runs for every key and value of every event
+_ALPHA_NUMERIC_RE = re.compile(Const.Regex.AlphaNumeric)
+_VARIABLE_RE = re.compile(Const.Regex.Variable)
+_PATH_LIKE_RE = re.compile(Const.Regex.PathLike)
+_SANITIZE_PATTERNS = {Const.Regex.AlphaNumeric: _ALPHA_NUMERIC_RE, Const.Regex.Variable: _VARIABLE_RE, Const.Regex.PathLike: _PATH_LIKE_RE}
+# every block check in one alternation, so one match call covers all of them
+_BLOCK_NO_COMMENT_RE = re.compile(f"(?i:{Const.Regex.BlockDrop.removeprefix('(?i)')}|{Const.Regex.BlockDelete.removeprefix('(?i)')})")
+_BLOCK_ALL_RE = re.compile(f"{_BLOCK_NO_COMMENT_RE.pattern}|{Const.Regex.BlockSqlComment}")
+
+
 class RegexValidator():
     def validate(self, instance: dict or bool) -> dict:
         def sub_validate(sub_instance):
             if isinstance(sub_instance, dict):
                 for k, v in sub_instance.items():
-                    if not self.sanitize(f"{k}", Const.Regex.Variable):  # allow letters, numbers, and underscores only in keys
+                    if not self.sanitize(f"{k}", _VARIABLE_RE):  # allow letters, numbers, and underscores only in keys
                         raise jsonschema.ValidationError(f"Key {k} is not sanitary!")
                     sub_validate(v)
             elif isinstance(sub_instance, list):
                 for item in sub_instance:
                     sub_validate(item)
             else:
-                if not self.sanitize(f"{sub_instance}", Const.Regex.PathLike):  # allow anything that's allowed in a path in a variable
+                if not self.sanitize(f"{sub_instance}", _PATH_LIKE_RE):  # allow anything that's allowed in a path in a variable
                     raise jsonschema.ValidationError(f"Value {sub_instance} is not sanitary!")
         return sub_validate(instance)
 
-    def sanitize(self, data, regex_string=Const.Regex.AlphaNumeric, double_dash_exempt=False):
-        match = re.match(regex_string, data)
-        block_drop = re.match(Const.Regex.BlockDrop, data)
-        block_delete = re.match(Const.Regex.BlockDelete, data)
-        block_sql = None if double_dash_exempt else re.match(Const.Regex.BlockSqlComment, data)
-        return match and not block_drop and not block_sql and not block_delete
+    def sanitize(self, data, regex_string: str | re.Pattern = _ALPHA_NUMERIC_RE, double_dash_exempt=False):
+        if isinstance(regex_string, re.Pattern):
+            regex = regex_string
+        else:
+            regex = _SANITIZE_PATTERNS.get(regex_string) or re.compile(regex_string)
+        match = regex.match(data)
+        block = _BLOCK_NO_COMMENT_RE if double_dash_exempt else _BLOCK_ALL_RE
+        return match and not block.match(data)
 
 
 class Schemas:
@@ -3,8 +3,8 @@ import os
 func_doc_threshold = 50  # how many lines require a definition for a function
 class_doc_threshold = 20  # how many lines require a definition for a class
 breakup_threshold = 200  # how many lines before a function should be broken up
-breakup_exceptions = []
-dir_exceptions = ["__pycache__", "marsenv"]
+breakup_exceptions = frozenset()  # frozensets, these are checked for every function and directory
+dir_exceptions = frozenset({"__pycache__", "marsenv"})
 
 def should_break(text, name, i, n):
     if len(name):
@@ -21,9 +21,11 @@ def should_doc(text, name, i, n, is_class):
 
 def walk(d):
     #print(f"Walking {d}")
-    files = os.listdir(d)
-    for fi in files:  # gets the files/folders in a dir
-        full_path = os.path.join(d, fi)
+    with os.scandir(d) as entries:  # names and types come with the listing, so no stat per entry
+        entries = list(entries)
+    for entry in entries:  # gets the files/folders in a dir
+        fi = entry.name
+        full_path = entry.path
         if fi.endswith(".py"):
             print(f"Analyzing {full_path}")
             with open(full_path, 'r') as f_code:
@@ -43,7 +45,7 @@ def walk(d):
                         should_doc(text, class_name, i, class_start, is_class=True)  # check if should document the class
                         class_name = line[6:line.find(":")]  # get a class name between class and :
                         class_start = i
-        elif "." not in fi and fi not in dir_exceptions:
+        elif "." not in fi and fi not in dir_exceptions and entry.is_dir():  # excluded dirs are skipped by name before anything else
             try:
                 walk(full_path)  # walk the sub dir
             except Exception as walk_dir_exception:
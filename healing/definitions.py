@@ -1,3 +1,6 @@
+import re
+
+
 class Directories:
     Configs = "configs"  # where config files are generally stored
     Docs = "docs"  # where documentation is stored
@@ -53,14 +56,18 @@ class RegexStrings:
     BlockDelete = r"(?i)Delete from"
     BlockDrop = r"(?i)Drop (index|constraint|table|column|primary|foreign|check|database|view)"
     BlockSqlComment = r"--"
+    # the Block* rules combined so one scan checks them all, the (?i) flag is scoped since it can't sit mid-pattern
+    BlockAllButSqlComment = f"(?i:{BlockDrop.removeprefix('(?i)')}|{BlockDelete.removeprefix('(?i)')})"
+    BlockAll = f"{BlockAllButSqlComment}|{BlockSqlComment}"
     Directory = r"([a-zA-Z]:\\\\)|(\/|\\|\\\\){0,1}(\w+(\/|\\|\\\\))*\w+(\/|\\|\\\\)*"
     FriendlyName = r"[^a-zA-Z0-9_\-\(\)\. ]+"  # non-friendly name characters
     Hashed_Host = r"[a-zA-Z\.0-9]+_[0-9]{4}"
     Numeric = r"(0-9)+\.*(0-9)+"
-    PathLike = r"((?:[^;]*/)*)(.*)"
+    PathLike = r"((?:[^;]*/)?)(.*)"  # one optional prefix, a repeated one matches the same strings but backtracks exponentially
     PathTraversal = r"(/|\\|\\\\)\.\.(/|\\|\\\\)"
     PythonFile = r"([a-zA-Z]:){0,1}(/|\\|\\\\){0,1}(\w+(/|\\|\\\\))*\w+\.py"
     SpaceDelimiter = r"[ ]{2,}"
+    TimeDelta = r"(?:(-?\d+) days?, )?(\d+):(\d{2}):(\d{2})(?:\.(\d+))?"  # str(datetime.timedelta), e.g. 1 day, 2:03:04.500000
     Tuple = r"[a-zA-Z0-9_\(\)\,]"
     Url = r"http(s){0,1}:\/\/(((([0-1]*[0-9]*[0-9]\.|2[0-5][0-5]\.){3})([0-1]*[0-9]*[0-9]|2[0-5][0-5])(:[0-9]{0,4}|[0-5][0-9]{4}|6[0-5][0-5][0-3][0-5])*)|((\d*[a-zA-Z][a-zA-Z0-9\.]*(\-*))+\.[a-zA-Z0-9]{1,3}))((/[\w\-\.]*)*(\?\w+=\w+)*)*"
     MarkdownLink = r"\[.*\]\(.*\)"
@@ -68,6 +75,18 @@ class RegexStrings:
     AnsiEscapes = r"\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])"
 
 
+class RegexPatterns:
+    """
+    Contains the RegexStrings compiled once at import
+    use these when matching in code, RegexStrings are kept as strings for schemas
+    """
+
+
+for _name, _regex_string in vars(RegexStrings).items():
+    if not _name.startswith("_"):
+        setattr(RegexPatterns, _name, re.compile(_regex_string))
+
+
 class ResultDefinitions:
     ResultFilePass = "OK"
     ResultFileFail = "FAIL"
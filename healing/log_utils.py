@@ -1,15 +1,18 @@
 import collections
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 import os
+import queue
 from pathlib import Path
 import shutil
 import sys
+import threading
+import time
 from typing import Mapping, Tuple
 
 
 from definitions import FileNames
-from utils import get_caller_name, get_project_root, ResourceManager
+from utils import get_project_root, ResourceManager
 
 
 def GetLogFormatter(standard=True) -> logging.Formatter:
@@ -22,25 +25,23 @@ def GetLogFormatter(standard=True) -> logging.Formatter:
     Returns:
         logging.Formatter: The formatter to apply to a logging.Logger instance
     """
-    class StandardFormatter(logging.Formatter):
-        def custom_formatting_method(string):
-            items = string.split("||")
-            items = items[:2] + [get_caller_name(10)] + items[2:]
-            return " || ".join(items)
+    class CachedTimeFormatter(logging.Formatter):
+        _last_time = (None, "")  # (second, formatted time), strftime only needs to run once a second
 
-        def format(self, record):
-            default_formatted = logging.Formatter.format(self, record)
-            return StandardFormatter.custom_formatting_method(default_formatted)
-    
-    class SimpleFormatter(logging.Formatter):
-        def custom_formatting_method(string):
-            return " || ".join(string.split("||"))
-
-        def format(self, record):
-            default_formatted = logging.Formatter.format(self, record)
-            return SimpleFormatter.custom_formatting_method(default_formatted)
+        def formatTime(self, record, datefmt=None):
+            if datefmt:
+                return logging.Formatter.formatTime(self, record, datefmt)
+            second = int(record.created)
+            last_time = self._last_time  # one tuple, so another thread can't mix up the second and its string
+            if last_time[0] != second:
+                last_time = (second, time.strftime(self.default_time_format, self.converter(second)))
+                self._last_time = last_time
+            return self.default_msec_format % (last_time[1], record.msecs)
 
-    return StandardFormatter(f"%(asctime)s||%(levelname)5s||%(message)s") if standard else SimpleFormatter(f"%(asctime)s||%(message)s")
+    if standard:
+        # the record already knows where it was logged from, no need to walk the stack for it
+        return CachedTimeFormatter(f"%(asctime)s || %(levelname)5s || %(funcName)s in %(module)s:%(lineno)d || %(message)s")
+    return CachedTimeFormatter(f"%(asctime)s || %(message)s")
 
 
 class Logger():
@@ -68,27 +69,27 @@ class Logger():
         return self.instance.addHandler(hdlr)
 
     def info(self, msg: object, *args: object, exc_info: BaseException = None, stack_info: bool = False, extra: Mapping[str, object] | None = None) -> None:
-        return self.instance.info(msg, *args, exc_info=exc_info, stack_info=stack_info, extra=extra)
+        return self.instance.info(msg, *args, exc_info=exc_info, stack_info=stack_info, extra=extra, stacklevel=2)
     
     def error(self, msg: object, *args: object, exc_info: BaseException = None, stack_info: bool = False, extra: Mapping[str, object] | None = None) -> None:
-        self.error_log.error(msg, *args, exc_info=exc_info, stack_info=stack_info, extra=extra)
-        return self.instance.error(msg, *args, exc_info=exc_info, stack_info=stack_info, extra=extra)
+        self.error_log.error(msg, *args, exc_info=exc_info, stack_info=stack_info, extra=extra, stacklevel=2)
+        return self.instance.error(msg, *args, exc_info=exc_info, stack_info=stack_info, extra=extra, stacklevel=2)
     
     def warn(self, msg: object, *args: object, exc_info: BaseException = None, stack_info: bool = False, extra: Mapping[str, object] | None = None) -> None:
-        return self.instance.warn(msg, *args, exc_info=exc_info, stack_info=stack_info, extra=extra)
+        return self.instance.warn(msg, *args, exc_info=exc_info, stack_info=stack_info, extra=extra, stacklevel=2)
     
     def warning(self, msg: object, *args: object, exc_info: BaseException = None, stack_info: bool = False, extra: Mapping[str, object] | None = None) -> None:
-        return self.instance.warning(msg, *args, exc_info=exc_info, stack_info=stack_info, extra=extra)
+        return self.instance.warning(msg, *args, exc_info=exc_info, stack_info=stack_info, extra=extra, stacklevel=2)
     
     def exception(self, msg: object, *args: object, exc_info: BaseException = None, stack_info: bool = False, extra: Mapping[str, object] | None = None) -> None:
-        self.error_log.exception(msg, *args, exc_info=exc_info, stack_info=stack_info, extra=extra)
-        return self.instance.exception(msg, *args, exc_info=exc_info, stack_info=stack_info, extra=extra)
+        self.error_log.exception(msg, *args, exc_info=exc_info, stack_info=stack_info, extra=extra, stacklevel=2)
+        return self.instance.exception(msg, *args, exc_info=exc_info, stack_info=stack_info, extra=extra, stacklevel=2)
     
     def debug(self, msg: object, *args: object, exc_info: BaseException = None, stack_info: bool = False, extra: Mapping[str, object] | None = None) -> None:
-        return self.instance.debug(msg, *args, exc_info=exc_info, stack_info=stack_info, extra=extra)
+        return self.instance.debug(msg, *args, exc_info=exc_info, stack_info=stack_info, extra=extra, stacklevel=2)
     
     def critical(self, msg: object, *args: object, exc_info: BaseException = None, stack_info: bool = False, extra: Mapping[str, object] | None = None) -> None:
-        return self.instance.critical(msg, *args, exc_info=exc_info, stack_info=stack_info, extra=extra)
+        return self.instance.critical(msg, *args, exc_info=exc_info, stack_info=stack_info, extra=extra, stacklevel=2)
 
 
 class ConsoleLogHandler(logging.StreamHandler):
@@ -98,16 +99,54 @@ class ConsoleLogHandler(logging.StreamHandler):
     pass
 
 
-def GetConsoleLogHandler() -> logging.StreamHandler:
+class QueuedLogHandler(QueueHandler):
     """
-    Creates a ConsoleLogHandler instance that wraps sys.stdout so the logger instance will print to the console as well as file
+    Formats records on the logging thread (the caller name depends on its stack) and hands them to a background thread
+    which does the slow console/file writes, so logging calls return without waiting on I/O
 
-    Returns:
-        logging.StreamHandler: the stream handler instance to add to the logging.Logger handlers
+    the background thread only exists in the process that created the handler, forked children write directly instead
     """
-    consoleHandler = ConsoleLogHandler(sys.stdout)
-    consoleHandler.setFormatter(GetLogFormatter())
-    return consoleHandler
+    def __init__(self, *handlers: logging.Handler):
+        super().__init__(queue.Queue())  # a Queue rather than a SimpleQueue, the listener marks each record done so flush can wait
+        self.listener = QueueListener(self.queue, *handlers)
+        self.listener.start()
+        self.listening = True
+        self._pid = os.getpid()
+        self._close_lock = threading.Lock()
+
+    def emit(self, record: logging.LogRecord):
+        """
+        queues a record for the background thread, or writes it straight away in a forked child where nothing reads the queue
+
+        Args:
+            record (logging.LogRecord): the record to write
+        """
+        if os.getpid() == self._pid:
+            return super().emit(record)
+        try:
+            self.listener.handle(self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        """
+        waits until everything queued so far has been written, e.g. before the log files are copied
+        """
+        if self.listening and os.getpid() == self._pid:  # a forked child's copy of the queue is never read
+            self.queue.join()
+
+    def close(self):
+        """
+        writes out anything still queued and closes the wrapped handlers, logging calls this at exit
+        """
+        with self._close_lock:  # only one caller stops the listener
+            if self.listening:
+                self.listening = False
+                if os.getpid() == self._pid:
+                    self.listener.stop()
+                for handler in self.listener.handlers:
+                    handler.close()
+        super().close()
 
 
 class TailLogHandler(logging.Handler):
@@ -117,6 +156,7 @@ class TailLogHandler(logging.Handler):
     def __init__(self, log_queue):
         logging.Handler.__init__(self)
         self.log_queue = log_queue
+        self.emitted = 0  # lets readers tell whether the queue changed since they last looked
     
 
     def emit(self, record:str):
@@ -127,6 +167,7 @@ class TailLogHandler(logging.Handler):
             record (str): a message to save
         """
         self.log_queue.append(self.format(record))
+        self.emitted += 1
 
 
 class TailLogger(object):
@@ -139,15 +180,19 @@ class TailLogger(object):
     def __init__(self, maxlen):
         self._log_queue = collections.deque(maxlen=maxlen)
         self._log_handler = TailLogHandler(self._log_queue)
+        self._contents = (0, "")  # (emitted count, joined lines), polling is more frequent than logging
 
     def contents(self) -> str:
         """
-        returns the contents of the buffer
+        returns the contents of the buffer, only rejoined when something was logged since the last call
 
         Returns:
             str: the newline-joined list of log lines
         """
-        return '\n'.join(self._log_queue)
+        emitted = self._log_handler.emitted
+        if self._contents[0] != emitted:
+            self._contents = (emitted, '\n'.join(self._log_queue))
+        return self._contents[1]
 
     @property
     def log_handler(self):
@@ -190,6 +235,8 @@ def dump_log_data_to_dir(logger:Logger, dir_name:str | Path):
         logger (Logger): the logging object
         dir_name (str | Path): the directory to store logs
     """
+    for handler in logger.handlers:
+        handler.flush()  # queued lines need to be in the files before they're copied
     os.makedirs(dir_name, mode=777, exist_ok=True)
     shutil.copy(Path(get_project_root(), FileNames.LogName), dir_name)  # for some reason this is complaining permission is denied
     shutil.copy(Path(get_project_root(), FileNames.ErrorLogName), dir_name)
@@ -227,18 +274,15 @@ def get_log(logger:Logger | logging.Logger=None, log_name:str=f"{Path(get_projec
     #     if format:
     #         file_handler.setFormatter(GetLogFormatter())
     #     logger.addHandler(file_handler)
-    if not any(isinstance(handler, ConsoleLogHandler) for handler in logger.handlers):
-        console_handler = GetConsoleLogHandler()
-        if format:
-            console_handler.setFormatter(GetLogFormatter())
-            console_handler.setLevel(log_level if log_level else logging.INFO)
-        logger.addHandler(console_handler)
-    if not any(isinstance(handler, RotatingFileHandler) for handler in logger.handlers):
+    if not any(isinstance(handler, QueuedLogHandler) for handler in logger.handlers):
+        # the console and file handlers only write what the queued handler already formatted and filtered
+        console_handler = ConsoleLogHandler(sys.stdout)
         rotating_log_handler = RotatingFileHandler(log_name, maxBytes=10_000_000, backupCount=10,)
+        queued_handler = QueuedLogHandler(console_handler, rotating_log_handler)
         if format:
-            rotating_log_handler.setFormatter(GetLogFormatter())
-        rotating_log_handler.setLevel(log_level if log_level else logging.INFO)
-        logger.addHandler(rotating_log_handler)
+            queued_handler.setFormatter(GetLogFormatter())
+        queued_handler.setLevel(log_level if log_level else logging.INFO)
+        logger.addHandler(queued_handler)
     if log_level:
         logger.setLevel(log_level)
     ResourceManager._assign_logger(logger)
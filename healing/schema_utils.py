@@ -1,49 +1,154 @@
-import json
+from collections.abc import Mapping
 import jsonschema
 import os
 from pathlib import Path
 
 from definitions import Directories
-from utils import safe_path, get_project_root, import_module_from_path
+from utils import safe_path, get_project_root, get_identity_cached, import_module_from_path, load_json_file_2_dict
 
 
-class Schemas(dict):
+class Schemas(Mapping):
     """
     Consolidates schema data
 
-    builds an object capable of access via field access or dict item access regardless of extension
+    builds an object capable of access via field access or dict item access, item access works with or without the extension
     the following examples all load the same schema
     Schemas.example_schema
-    Schemas.example_schema.json
     Schemas["example_schema"]
     Schemas["example_schema.json"]
+
+    schema files are only found up front, each one is loaded and checked the first time it is accessed
+    every mapping view (in, len(), iteration, keys/items/values, ==) covers every schema file and goes through item access,
+    keys are the names without extensions
     """
     def __init__(self):
         self.all_schemas = []
+        self._schema_files = {}
+        self._loaded = {}
         schema_path = safe_path(Path(get_project_root(), Directories.Schemas), relative=False)
         schema_paths = [schema_path]
         for path in schema_paths:
-            for file in path.iterdir():
-                if file.name.endswith(".py") and not "__init__" in file.name:
-                    schema = import_module_from_path(file, relative=False).schema
-                elif file.name.endswith(".json"):
-                    with open(file, 'r') as schema:
-                        schema = json.loads(schema.read())
-                else:
-                    # print(f"Skipping non-functional file in schema dir: '{file}'")
-                    continue
-                jsonschema.Draft202012Validator.check_schema(schema)
-                schema_file = os.path.basename(file.name)
-                self[schema_file] = schema
-                no_ext = os.path.splitext(schema_file)[0]
-                self[no_ext] = schema
-                self.__setattr__(no_ext, schema)
-                self.all_schemas.append(no_ext)
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    schema_file = entry.name
+                    if (schema_file.endswith(".py") and not "__init__" in schema_file) or schema_file.endswith(".json"):
+                        no_ext = os.path.splitext(schema_file)[0]
+                        self._schema_files[no_ext] = entry.path
+                        self.all_schemas.append(no_ext)
+                    # else:
+                    #     print(f"Skipping non-functional file in schema dir: '{entry.path}'")
+
+    def __getitem__(self, name: str) -> dict:
+        """
+        gets a schema, loading it the first time it is requested
+        schemas are only stored under their name without the extension
+
+        Args:
+            name (str): the schema name, with or without the extension
+
+        Raises:
+            KeyError: there is no schema file with that name
+
+        Returns:
+            dict: the schema
+        """
+        if name not in self:  # no file, or a file with a different extension
+            raise KeyError(name)
+        no_ext = name.removesuffix(".json").removesuffix(".py")
+        schema = self._loaded.get(no_ext)
+        if schema is None:
+            file = self._schema_files[no_ext]
+            if file.endswith(".py"):
+                schema = import_module_from_path(file, relative=False).schema
+            else:
+                schema = load_json_file_2_dict(file)  # uses orjson when it is installed
+            _get_validator(schema)  # checks the schema and builds its validator once, validate_schema reuses it
+            self._loaded[no_ext] = schema
+        return schema
+
+    def __contains__(self, name: str) -> bool:
+        """
+        checks for a schema file rather than a loaded schema, so schemas that haven't been accessed yet are found without loading them
+
+        Args:
+            name (str): the schema name, with or without the extension
+
+        Returns:
+            bool: whether there is a schema file with that name
+        """
+        if not isinstance(name, str):
+            return False
+        no_ext = name.removesuffix(".json").removesuffix(".py")
+        file = self._schema_files.get(no_ext)
+        return file is not None and file.endswith(name[len(no_ext):])
+
+    def __iter__(self):
+        return iter(self._schema_files)
+
+    def __len__(self) -> int:
+        return len(self._schema_files)
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+    def __getattr__(self, name: str) -> dict:
+        """
+        loads a schema through field access
+
+        Args:
+            name (str): the schema name
+
+        Raises:
+            AttributeError: there is no schema file with that name
+
+        Returns:
+            dict: the schema
+        """
+        if name.startswith("_"):  # internal attributes are never schemas
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
 
 
 Schemas = Schemas()
 
 
+_validators = {}  # id(schema): (schema, validator) for the most recently used schemas, see _get_validator
+
+
+def _get_validator(schema: dict) -> jsonschema.protocols.Validator:
+    """
+    Gets the validator for a schema, building it (and checking the schema) only when it isn't cached
+
+    Args:
+        schema (dict): the schema to validate against
+
+    Returns:
+        jsonschema.protocols.Validator: the validator for the schema
+    """
+    return get_identity_cached(_validators, schema, _build_validator)
+
+
+def _build_validator(schema: dict) -> jsonschema.protocols.Validator:
+    """
+    Checks a schema and builds its validator
+
+    Args:
+        schema (dict): the schema to validate against
+
+    Raises:
+        jsonschema.SchemaError: the schema itself is invalid
+
+    Returns:
+        jsonschema.protocols.Validator: the validator for the schema
+    """
+    validator_class = jsonschema.validators.validator_for(schema)
+    validator_class.check_schema(schema)
+    return validator_class(schema)
+
+
 def validate_schema(instance: dict | bool, schema: dict) -> None:
     """
     Wraps the jsonschma's validate function with some better error handling, especially useful in the case of custom error messages
@@ -56,27 +161,22 @@ def validate_schema(instance: dict | bool, schema: dict) -> None:
         SchemaValidationError: error validating the schema
     """
     try:
-        jsonschema.validate(instance, schema)
+        error = jsonschema.exceptions.best_match(_get_validator(schema).iter_errors(instance))
+        if error is not None:
+            raise error
         return instance
     except Exception as validation_exception:
-        err = f"{validation_exception}"
         instance_str = f"{instance}"
         if len(instance_str) > 32:  # need to shrink this down
             instance_str = f"{instance_str[:32]}..."
-        if "error message" in err:
-            err_start = err.find("error message")+15
-            err = err[err_start:]
-            err_end = err.find("\n", err_start)
-            err = err[:err_end]
-            pattern_str = ""
-            if "'pattern'" in err:
-                pattern_start = err.find("'pattern'")
-                pattern = err[pattern_start+11:].strip()
-                err = err[:pattern_start].strip()
-                pattern_str = f"\nUse regex pattern: {pattern}"
+        error_schema = getattr(validation_exception, "schema", None)  # the part of the schema that failed, rather than parsing the error text
+        err = error_schema.get("error message") if isinstance(error_schema, dict) else None
+        if err:
+            pattern = error_schema.get("pattern")
+            pattern_str = f"\nUse regex pattern: {pattern}" if pattern else ""
             raise jsonschema.ValidationError(f"Error validating {instance_str} because {err}{pattern_str}")
         else:
-            raise jsonschema.ValidationError(f"Error validating {instance_str}\n{err}")
+            raise jsonschema.ValidationError(f"Error validating {instance_str}\n{validation_exception}")
 
 
 if __name__ == "__main__":
@@ -9,30 +9,53 @@ from definitions import Directories, FileNames, RegexStrings, ResultDefinitions
 from utils import load_json_file_2_dict, get_project_root
 
 
-test_names = list(load_json_file_2_dict(Path(get_project_root(), Directories.Configs, FileNames.ResultMap)).keys())  # get the names from the result map file
+def _build_schema() -> dict:
+    """
+    Builds the schema from the test names in the result map
 
-
-schema = {
-    "type": "object",
-    "propertyNames": {
-        "enum": test_names
-    },
-    "additionalProperties": {
+    Returns:
+        dict: the schema for the fs_result.log file
+    """
+    test_names = list(load_json_file_2_dict(Path(get_project_root(), Directories.Configs, FileNames.ResultMap)).keys())  # get the names from the result map file
+    return {
         "type": "object",
-        "properties": {
-            "Test": {
-                "type": "string",
-                "enum": test_names,
-                "error message": f"This data should be a test name in the list of {test_names}"
-            },
-            "Result": {
-                "type": "string",
-                "enum": [ResultDefinitions.ResultFilePass, ResultDefinitions.ResultFileFail],
-                "error message": f"This data should contain {ResultDefinitions.ResultFilePass} or {ResultDefinitions.ResultFileFail}"
+        "propertyNames": {
+            "enum": test_names
+        },
+        "additionalProperties": {
+            "type": "object",
+            "properties": {
+                "Test": {
+                    "type": "string",
+                    "enum": test_names,
+                    "error message": f"This data should be a test name in the list of {test_names}"
+                },
+                "Result": {
+                    "type": "string",
+                    "enum": [ResultDefinitions.ResultFilePass, ResultDefinitions.ResultFileFail],
+                    "error message": f"This data should contain {ResultDefinitions.ResultFilePass} or {ResultDefinitions.ResultFileFail}"
+                }
             }
         }
     }
-}
+
+
+def __getattr__(name: str):
+    """
+    Builds schema and test_names on first access instead of on import (PEP 562)
+
+    Args:
+        name (str): the module attribute being looked up
+
+    Returns:
+        the schema dict or the list of test names
+    """
+    if name in ("schema", "test_names"):
+        schema = globals()["schema"] = _build_schema()
+        globals()["test_names"] = schema["propertyNames"]["enum"]
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == "__main__":
     from definitions import Strings
@@ -1,10 +1,9 @@
 import atexit
-from concurrent.futures import as_completed, Future, ProcessPoolExecutor, ThreadPoolExecutor
-from concurrent.futures._base import RUNNING
+import cProfile
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait as wait_for_futures
 import datetime
-import inspect
+from itertools import islice
 import json
-import jsonschema
 import logging
 import os
 from pathlib import Path
@@ -12,13 +11,21 @@ import re
 import sys
 from types import ModuleType
 from typing import Callable
+import zlib
 
+try:
+    import orjson  # optional, parses json several times faster than the json module
+except ImportError:
+    orjson = None
 
 from definitions import *
 
 
 _proj_root = None
 _proj_root_str = None
+_imported_modules = {}  # (module path, mtime_ns): module, see import_module_from_path
+_defaults_templates = {}  # id(schema) -> (schema, template), bounded, see _get_defaults_template
+_smart_quote_table = str.maketrans({"\u201c": '"', "\u201d": '"', "\u2018": "\'", "\u2019": "\'"})  # fancy quotes to neutral quotes
 
 
 def get_project_root(as_str=False) -> Path:
@@ -53,12 +60,13 @@ def safe_path(path: str | Path, relative:bool=True) -> Path:
     """
     str_path = f"{path}" if isinstance(path, Path) else path
     path: Path = path if isinstance(path, Path) else Path(path)
-    assert not re.search(RegexStrings.PathTraversal, str_path), "Path traversal detected! Cannot resolve path"
-    assert re.fullmatch(RegexStrings.PathLike, str_path), "Path does not match path format! Cannot resolve path"
+    # the regexes are only needed for the rare paths that could fail them, ".." anywhere or a multi-line path
+    assert ".." not in str_path or not RegexPatterns.PathTraversal.search(str_path), "Path traversal detected! Cannot resolve path"
+    assert "\n" not in str_path or RegexPatterns.PathLike.fullmatch(str_path), "Path does not match path format! Cannot resolve path"
     path = path.resolve()
     if relative:
         try:
-            return path.relative_to(get_project_root().resolve())
+            return path.relative_to(get_project_root())  # already resolved
         except ValueError:  # not relative to root dir
             return path
     else:
@@ -84,10 +92,14 @@ def import_module_from_path(mod_path:str | Path, relative=False) -> ModuleType:
             mod_path = mod_path.relative_to(get_project_root())
         mod_path: str = f"{mod_path}"
         assert os.path.exists(mod_path), f"{mod_path} doesn't exist. Can't import it!"
-        spec = importlib.util.spec_from_file_location(mod_name, mod_path)
-        new_mod = importlib.util.module_from_spec(spec)
-        if mod_name != "__main__":  # this will execute the main section instead of just an import
-            spec.loader.exec_module(new_mod)
+        key = (mod_path, os.stat(mod_path).st_mtime_ns)  # an edited file gets executed again
+        new_mod = _imported_modules.get(key)
+        if new_mod is None:
+            spec = importlib.util.spec_from_file_location(mod_name, mod_path)
+            new_mod = importlib.util.module_from_spec(spec)
+            if mod_name != "__main__":  # this will execute the main section instead of just an import
+                spec.loader.exec_module(new_mod)
+            _imported_modules[key] = new_mod
     else:
         from importlib import import_module
         mod_path: str = f"{mod_path}"
@@ -95,37 +107,117 @@ def import_module_from_path(mod_path:str | Path, relative=False) -> ModuleType:
     return new_mod
 
 
-def start_profiling(log=False) -> dict:
+_logging_profiler = None  # (counts, stop function) for the running logging profiler, only one can hook the interpreter at a time
+
+
+def start_profiling(log=False) -> cProfile.Profile | dict:
     """
     Starts function profiling
-    #TODO: add timing, probably need to use if event == "return":
+    cProfile does the counting in C, logging each call needs a python trace function so it is only used when log is set
+    starting a logging profiler stops the previous one, stop_profiling turns either kind off
+    #TODO: add timing when logging, probably need to use if event == "return": (the cProfile profiler has it already)
     Args:
         log (bool, optional): whether or not to log each function call. Defaults to False.
 
     Returns:
-        dict: the profiling dictionary containing the functions and times called
+        cProfile.Profile or Counter: the running profiler, or the counts keyed by (filename, function name) when logging
     """
+    if not log:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    global _logging_profiler
+    if _logging_profiler is not None:
+        stop_profiling(_logging_profiler[0])
+
+    from collections import Counter
     root_path = get_project_root(as_str=True)
-    root_len = len(root_path)
-    profiling_dict = {}
+    profiling_dict = Counter()
 
-    def trace_calls(frame, event, arg):
-        if event != "call":
-            return
+    def log_call(frame):
         co = frame.f_code
         func_filename = co.co_filename
-        if not func_filename.startswith(root_path):
-            return
         func_name = co.co_name
         caller = frame.f_back
-        func_id = f"{func_filename[root_len:]}:{func_name}"
-        profiling_dict.setdefault(func_id, 1)
+        # both strings belong to the code object and cache their hashes, so nothing is built or rehashed per call
+        func_id = (func_filename, func_name)
         profiling_dict[func_id] += 1
-        if log:
-            print(f"Call #{profiling_dict[func_id]} to {func_name} on line {frame.f_lineno} of {func_filename} from line {caller.f_lineno} of {caller.f_code.co_filename}")
+        called_from = f"line {caller.f_lineno} of {caller.f_code.co_filename}" if caller else "the interpreter"  # e.g. atexit callbacks
+        print(f"Call #{profiling_dict[func_id]} to {func_name} on line {frame.f_lineno} of {func_filename} from {called_from}")
+
+    monitoring = getattr(sys, "monitoring", None)
+    # python 3.12+, only function starts are reported and other code can be switched off
+    # cProfile uses the same tool id on 3.12+, so while it is running calls are logged through the older hook instead
+    if monitoring and monitoring.get_tool(monitoring.PROFILER_ID) is None:
+        def on_start(code, instruction_offset):
+            if not code.co_filename.startswith(root_path):
+                return monitoring.DISABLE  # the interpreter stops reporting this code object at all
+            log_call(sys._getframe(1))
+
+        monitoring.use_tool_id(monitoring.PROFILER_ID, "healing profiler")
+        monitoring.register_callback(monitoring.PROFILER_ID, monitoring.events.PY_START, on_start)
+        monitoring.set_events(monitoring.PROFILER_ID, monitoring.events.PY_START)
+
+        def stop():
+            monitoring.set_events(monitoring.PROFILER_ID, 0)
+            monitoring.register_callback(monitoring.PROFILER_ID, monitoring.events.PY_START, None)
+            monitoring.free_tool_id(monitoring.PROFILER_ID)
+    else:
+        def trace_calls(frame, event, arg):
+            if event != "call":
+                return
+            if not frame.f_code.co_filename.startswith(root_path):
+                return
+            log_call(frame)
+
+        sys.setprofile(trace_calls)
+
+        def stop():
+            if sys.getprofile() is trace_calls:  # leave it alone if something else has replaced it since
+                sys.setprofile(None)
+    _logging_profiler = (profiling_dict, stop)
+    return profiling_dict
+
+
+def stop_profiling(profiler: cProfile.Profile | dict) -> None:
+    """
+    Stops a profiler returned by start_profiling, its counts are kept and can still be read with get_profiling_counts
+
+    Args:
+        profiler (cProfile.Profile or Counter): the profiler returned by start_profiling
+    """
+    global _logging_profiler
+    if not isinstance(profiler, dict):
+        profiler.disable()
+    elif _logging_profiler is not None and _logging_profiler[0] is profiler:  # an older one was already stopped when it was replaced
+        _logging_profiler[1]()
+        _logging_profiler = None
+
 
-    import sys
-    sys.setprofile(trace_calls)
+def get_profiling_counts(profiler: cProfile.Profile | dict) -> dict:
+    """
+    Gets how many times each function in the project was called
+
+    Args:
+        profiler (cProfile.Profile or Counter): the profiler returned by start_profiling
+
+    Returns:
+        dict: the profiling dictionary containing the functions and times called
+    """
+    root_path = get_project_root(as_str=True)
+    root_len = len(root_path)
+    if isinstance(profiler, dict):  # already counted while logging, just needs the readable names
+        counts = tuple(profiler.items())  # logging may still be on, and this function's own calls get counted
+        return {f"{filename[root_len:]}:{func_name}": count for (filename, func_name), count in counts}
+    profiler.disable()
+    profiling_dict = {}
+    for entry in profiler.getstats():
+        code = entry.code
+        if isinstance(code, str) or not code.co_filename.startswith(root_path):  # builtins only have a description string
+            continue
+        func_id = f"{code.co_filename[root_len:]}:{code.co_name}"
+        profiling_dict[func_id] = profiling_dict.get(func_id, 0) + entry.callcount
     return profiling_dict
 
 
@@ -137,12 +229,16 @@ def set_exit_handler(profiling=False):
         profiling (bool, optional): whether or not to set up profiling. Defaults to False.
     """
     if profiling:
-        profiling_dict = start_profiling(log=False)
+        profiler = start_profiling(log=False)
 
     def exit_handler():
         if profiling:
-            for k,v in sorted(profiling_dict.items(), key=lambda item:item[1]):
+            for k,v in sorted(get_profiling_counts(profiler).items(), key=lambda item:item[1]):
                 print(f"{k}: {v}")
+            import pstats
+            # cProfile already has the timings, show the slowest of the project's own functions
+            stats = pstats.Stats(profiler).sort_stats(pstats.SortKey.CUMULATIVE)
+            stats.print_stats(re.escape(get_project_root(as_str=True)), 50)
         print("Goodbye")
 
     import atexit
@@ -159,20 +255,14 @@ def timedelta_string_to_timedelta(td_str:str) -> datetime.timedelta:
     Returns:
         datetime.timedelta: the time delta
     """
-    td_str = td_str.strip('"')
-    if "days" in td_str:
-        days, delta = td_str.split(" days, ")
-        day_delta = datetime.timedelta(days=int(days))
-    else:
-        delta = td_str
-        day_delta = datetime.timedelta()  # no day offset
-    if '.' in delta:
-        timestamp = datetime.datetime.strptime(delta, "%H:%M:%S.%f")
-    else:
-        timestamp = datetime.datetime.strptime(delta, "%H:%M:%S")
-    delta = datetime.timedelta(days=day_delta.days, hours=timestamp.hour,
-                               minutes=timestamp.minute, seconds=timestamp.second)
-    return delta
+    # the format is fixed ([D day[s], ]H:MM:SS[.ffffff]) so one match pulls every field out
+    match = RegexPatterns.TimeDelta.fullmatch(td_str.strip('"'))
+    if match is None:
+        raise ValueError(f"'{td_str}' is not a time delta string")
+    days, hours, minutes, seconds, fraction = match.groups()
+    microseconds = int(fraction[:6].ljust(6, '0')) if fraction else 0
+    return datetime.timedelta(days=int(days or 0), hours=int(hours), minutes=int(minutes),
+                              seconds=int(seconds), microseconds=microseconds)
 
 
 def time_string_to_datetime(time_str:str) -> datetime.datetime:
@@ -186,7 +276,7 @@ def time_string_to_datetime(time_str:str) -> datetime.datetime:
         datetime.datetime: the datetime object
     """
     time_str = time_str.strip('"')
-    dtime = datetime.datetime.strptime(time_str, '%Y-%m-%d %H:%M:%S.%f')
+    dtime = datetime.datetime.fromisoformat(time_str)  # '%Y-%m-%d %H:%M:%S.%f' is iso format, and fromisoformat is implemented in C
     return dtime
 
 
@@ -223,21 +313,12 @@ def get_friendly_elapsed_time(elapsed) -> str:
     Returns:
         str: the time string in a friendly format
     """
-    elapsed_minutes = elapsed.seconds // 60 % 60
-    elapsed_hours = elapsed.seconds // 3600
-    if not elapsed.days > 0 and not elapsed_hours > 0 and not elapsed_minutes > 0:
+    elapsed_hours, elapsed_minutes = divmod(elapsed.seconds // 60, 60)
+    # 's'[:n > 1] is 's' for plurals and '' otherwise
+    parts = [f"{count} {unit}{'s'[:count > 1]}" for count, unit in ((elapsed.days, "day"), (elapsed_hours, "hour"), (elapsed_minutes, "minute")) if count > 0]
+    if not parts:
         return "now"
-    elapsed_minute_str = f"{elapsed_minutes} minute{'s' if elapsed_minutes > 1 else ''}" if elapsed_minutes > 0 else ""
-    elapsed_hour_str = f"{elapsed_hours} hour{'s' if elapsed_hours > 1 else ''}" if elapsed_hours > 0 else ""
-    elapsed_day_str = f"{elapsed.days} day{'s' if elapsed.days > 1 else ''}" if elapsed.days > 0 else ""
-
-    time_str = f"{elapsed_day_str}"
-    time_str += f"{', ' if elapsed.days > 0 and (elapsed_hours > 0 or elapsed_minutes > 0) else ''}"
-    time_str += f"{elapsed_hour_str}"
-    time_str += f"{', ' if elapsed_hours > 0 and elapsed_minutes > 0 else ''}"
-    time_str += f"{elapsed_minute_str}"
-    time_str += " ago"
-    return time_str
+    return f"{', '.join(parts)} ago"
 
 
 def get_current_time_string() -> str:
@@ -272,16 +353,14 @@ def get_caller_name(layers:int=1):
     Returns:
         str: The caller name string
     """
-    func_name = f"{inspect.stack()[layers][3]}"
-    try:
-        stack = inspect.stack()[layers+1]
-    except:
-        pass
+    frame = sys._getframe(layers)  # jump straight to the frame, inspect.stack() reads source lines for every frame
+    func_name = frame.f_code.co_name
     try:
+        stack = frame.f_back
         # this line uses reflection to get the name of the class that calls this line
-        calling_object = str(stack[0].f_locals["self"].__class__.__name__)
+        calling_object = stack.f_locals["self"].__class__.__name__
         # this line uses reflection to get the name of the function inside the class that calls this line
-        object_function = str(stack[3])
+        object_function = stack.f_code.co_name
         # this line uses reflection to get the name of the function that calls this log line
         return f"{func_name} in {calling_object}.{object_function}"
     except Exception as class_exception:  # failed to get the class name that called this method. oh well
@@ -316,7 +395,10 @@ class ThreadExecutor(ThreadPoolExecutor):
     def __init__(self, *args, **kwargs):
         self.log = None
         super().__init__(*args, **kwargs)
-        self.futures = []
+        self.futures = set()  # unfinished futures, each one removes itself when it's done
+        self._real_submit = super().submit  # bound once, submit is called for every task
+        self._futures_add = self.futures.add
+        self._futures_discard = self.futures.discard
 
     def submit(self, func: Callable, *args, **kwargs) -> Future:
         """
@@ -328,8 +410,9 @@ class ThreadExecutor(ThreadPoolExecutor):
         Returns:
             Future: the pending future object
         """
-        future = super().submit(func, *args, **kwargs)
-        self.futures.append(future)
+        future = self._real_submit(func, *args, **kwargs)
+        self._futures_add(future)
+        future.add_done_callback(self._futures_discard)  # only unfinished futures are kept, runs right away if already done
         return future
     
     def shutdown(self, wait: bool, cancel_futures: bool):
@@ -343,20 +426,18 @@ class ThreadExecutor(ThreadPoolExecutor):
         Returns:
             bool: whether or not shutdown went smoothly
         """
-        success = True
-        for future in as_completed(self.futures, 5):
-            exception = future.exception(1)
+        done, not_done = wait_for_futures(self.futures, timeout=5)  # one timeout for all of them, not one per future
+        success = not not_done
+        for future in done:
+            if future.cancelled():
+                continue
+            exception = future.exception()
             if exception is not None:
                 if self.log:
                     self.log.exception(f"Exception stopping thread: {exception}")
             else:
                 if self.log:
                     self.log.debug(f"Thread returned '{future.result()}'")
-        for sub_thread in self._threads:
-            try:
-                success = success and sub_thread.cancel() and not sub_thread._state == RUNNING
-            except:
-                success = False
         try:
             if sys.version_info.minor >= 9:
                 super().shutdown(wait=wait, cancel_futures=cancel_futures)
@@ -374,7 +455,10 @@ class ProcessExecutor(ProcessPoolExecutor):
     def __init__(self, *args, **kwargs):
         self.log = None
         super().__init__(*args, **kwargs)
-        self.futures = []
+        self.futures = set()  # unfinished futures, each one removes itself when it's done
+        self._real_submit = super().submit  # bound once, submit is called for every task
+        self._futures_add = self.futures.add
+        self._futures_discard = self.futures.discard
     
     def submit(self, func: Callable, *args, **kwargs) -> Future:
         """
@@ -386,8 +470,9 @@ class ProcessExecutor(ProcessPoolExecutor):
         Returns:
             Future: the pending future object
         """
-        future = super().submit(func, *args, **kwargs)
-        self.futures.append(future)
+        future = self._real_submit(func, *args, **kwargs)
+        self._futures_add(future)
+        future.add_done_callback(self._futures_discard)  # only unfinished futures are kept, runs right away if already done
         return future
 
     def shutdown(self, wait: bool, cancel_futures: bool):
@@ -401,20 +486,24 @@ class ProcessExecutor(ProcessPoolExecutor):
         Returns:
             bool: whether or not shutdown went smoothly
         """
-        success = True
-        for future in as_completed(self.futures, 5):
-            exception = future.exception(1)
+        done, not_done = wait_for_futures(self.futures, timeout=5)  # one timeout for all of them, not one per future
+        success = not not_done
+        for future in done:
+            if future.cancelled():
+                continue
+            exception = future.exception()
             if exception is not None:
                 if self.log:
                     self.log.exception(f"Exception stopping process: {exception}")
             else:
                 if self.log:
                     self.log.debug(f"Process returned '{future.result()}'")
-        for sub_process in self._processes.values():
-            try:
-                success = success and sub_process.kill() and not sub_process._state == RUNNING
-            except Exception as e:
-                success = False
+        if not wait:  # don't leave processes running behind us
+            for sub_process in (self._processes or {}).values():
+                try:
+                    sub_process.kill()
+                except Exception as e:
+                    success = False
         try:
             if sys.version_info.minor >= 9:
                 super().shutdown(wait=wait, cancel_futures=cancel_futures)
@@ -437,6 +526,7 @@ class ResourceManager:
         self.running = True
         self.thread_executor = ThreadExecutor()
         self.process_executor = ProcessExecutor()
+        self._submitters = (self.thread_executor.submit, self.process_executor.submit)  # indexed by not thread
         atexit.register(self.shutdown)
         self.log = None
     
@@ -466,10 +556,7 @@ class ResourceManager:
             Future: the future containing the job, meant for tracking and later result checking
         """
         try:
-            if thread:
-                return self.thread_executor.submit(submission, *args, **kwargs)
-            else:
-                return self.process_executor.submit(submission, *args, **kwargs)
+            return self._submitters[not thread](submission, *args, **kwargs)
         except Exception as submission_exception:
             raise Exception(f"Unable to submit {submission.__name__}: '{submission_exception}'")
 
@@ -491,23 +578,21 @@ class ResourceManager:
 ResourceManager = ResourceManager()
 
 
-def sanitize(data:str, regex_string=RegexStrings.AlphaNumeric, double_dash_exempt:bool=False) -> bool:
+def sanitize(data:str, regex_string:str | re.Pattern=RegexPatterns.AlphaNumeric, double_dash_exempt:bool=False) -> bool:
     """
     Determines if a string is sanitary
 
     Args:
         data (str): string to check
-        regex_string (_type_, optional): the regex check to make. Defaults to RegexStrings.AlphaNumeric.
+        regex_string (str or re.Pattern, optional): the regex check to make, ideally from RegexPatterns. Defaults to RegexPatterns.AlphaNumeric.
         double_dash_exempt (bool, optional): whether or not -- can be ignored, e.g. not SQL. Defaults to False.
 
     Returns:
         bool: whether or not the string is sanitary
     """
-    match = re.match(regex_string, data)
-    block_drop = re.findall(RegexStrings.BlockDrop, data)
-    block_delete = re.findall(RegexStrings.BlockDelete, data)
-    block_sql = None if double_dash_exempt else re.findall(RegexStrings.BlockSqlComment, data)
-    return match and not block_drop and not block_sql and not block_delete
+    regex = regex_string if isinstance(regex_string, re.Pattern) else re.compile(regex_string)
+    block = RegexPatterns.BlockAllButSqlComment if double_dash_exempt else RegexPatterns.BlockAll
+    return bool(regex.match(data)) and not block.search(data)
 
 
 def sanitize_dict(instance: dict | bool | list | str) -> bool:
@@ -520,29 +605,120 @@ def sanitize_dict(instance: dict | bool | list | str) -> bool:
     Returns:
         bool: true if data is valid
     """
-    def sub_sanitize(sub_instance):
+    import jsonschema  # only loaded once something is sanitized, it is slow to import
+    if not isinstance(instance, (dict, list)) and not sanitize(f"{instance}", RegexPatterns.PathLike):
+        raise jsonschema.ValidationError(f"Value {instance} is not sanitary!")
+    stack = [instance]  # walk the containers iteratively, deep configs shouldn't cost a frame per level
+    while stack:
+        sub_instance = stack.pop()
         if isinstance(sub_instance, dict):
             for k, v in sub_instance.items():
-                if not sanitize(f"{k}", RegexStrings.Variable):  # allow letters, numbers, space, and underscores only in keys
+                if not sanitize(f"{k}", RegexPatterns.Variable):  # allow letters, numbers, space, and underscores only in keys
                     raise jsonschema.ValidationError(f"Key {k} is not sanitary!")
-                if not sanitize(f"{v}", RegexStrings.PathLike):  # allow anything that's allowed in a path in a variable
+                if isinstance(v, (dict, list)):  # checked item by item, its whole str() would just repeat that work
+                    stack.append(v)
+                elif not sanitize(f"{v}", RegexPatterns.PathLike):  # allow anything that's allowed in a path in a variable
                     raise jsonschema.ValidationError(f"dict val {v} is not sanitary!")
-                sub_sanitize(v)
         elif isinstance(sub_instance, list):
             for item in sub_instance:
-                if not sanitize(f"{item}", RegexStrings.PathLike):  # allow anything that's allowed in a path in a variable
+                if isinstance(item, (dict, list)):
+                    stack.append(item)
+                elif not sanitize(f"{item}", RegexPatterns.PathLike):  # allow anything that's allowed in a path in a variable
                     raise jsonschema.ValidationError(f"list item {item} is not sanitary!")
-                sub_sanitize(item)
-        else:
-            if not sanitize(f"{sub_instance}", RegexStrings.PathLike):  # allow anything that's allowed in a path in a variable
-                raise jsonschema.ValidationError(f"Value {sub_instance} is not sanitary!")
-        return True
-    return sub_sanitize(instance)
+    return True
+
+
+def _build_defaults_template(schema: dict) -> dict:
+    """
+    Builds the template nodes that add_default_values_to_missing_keys would give each missing key of an object schema
+    each node is (children, value), a dict of child nodes for objects that get built, or None and the default value
+
+    Args:
+        schema (dict): an object schema without a default
+
+    Returns:
+        dict: the template nodes for each property in the schema
+    """
+    template = {}
+    stack = [(schema, template)]  # iterative, a deep schema shouldn't cost a frame per level
+    while stack:
+        schema, children = stack.pop()
+        for key, sub_schema in schema.get("properties", {}).items():
+            default_values = sub_schema.get("default", False)
+            if sub_schema.get("type") == "object" and not default_values:
+                sub_children = {}
+                children[key] = (sub_children, None)
+                stack.append((sub_schema, sub_children))
+            elif sub_schema.get("type") == "object":
+                children[key] = ({key: (None, default_values)}, None)
+            else:
+                children[key] = (None, default_values)
+    return template
+
+
+def get_identity_cached(cache: dict, obj: object, build: Callable, max_size: int = 64) -> object:
+    """
+    Gets the value cached for an object by its identity, for objects like schema dicts that can't be hashed
+    the object is kept next to its value so a reused id is never matched, and only the most recently used max_size are kept
+
+    Args:
+        cache (dict): the cache to use, id(obj): (obj, value)
+        obj (object): the object the value belongs to
+        build (Callable): builds the value from the object on a miss
+        max_size (int, optional): how many objects the cache holds at most. Defaults to 64.
+
+    Returns:
+        object: the cached or newly built value
+    """
+    cached = cache.pop(id(obj), None)  # put back at the end, so the front of the dict is the least recently used
+    if cached is None or cached[0] is not obj:
+        cached = (obj, build(obj))
+    cache[id(obj)] = cached
+    if len(cache) > max_size:
+        del cache[next(iter(cache))]
+    return cached[1]
+
+
+def _get_defaults_template(schema: dict) -> dict:
+    """
+    Gets the defaults template for an object schema, building it the first time the schema is seen
+
+    Args:
+        schema (dict): an object schema without a default
+
+    Returns:
+        dict: the template nodes for each property in the schema
+    """
+    return get_identity_cached(_defaults_templates, schema, _build_defaults_template)
+
+
+def _fill_defaults_template(children: dict) -> dict:
+    """
+    Builds fresh dicts from a defaults template so callers never share them
+
+    Args:
+        children (dict): the template nodes to build
+
+    Returns:
+        dict: the defaults
+    """
+    filled = {}
+    stack = [(children, filled)]
+    while stack:
+        children, target = stack.pop()
+        for k, (sub_children, value) in children.items():
+            if sub_children is None:
+                target[k] = value
+            else:
+                target[k] = sub_target = {}
+                stack.append((sub_children, sub_target))
+    return filled
 
 
 def add_default_values_to_missing_keys(data: dict, schema: dict, key: str="") -> dict:
     """
     Recursively adds default values to a dictionary for missing keys based upon a given schema
+    the defaults for each schema are worked out once and reused for every instance
     Args:
         data:
         schema:
@@ -552,12 +728,9 @@ def add_default_values_to_missing_keys(data: dict, schema: dict, key: str="") ->
     """
     default_values = schema.get("default", False)
     if schema.get("type") == "object" and not default_values:
-        schema_keys = list(schema.get("properties", {}).keys())
-        seen_keys = list(data.keys())
-        missing_keys = list(set(schema_keys).difference(seen_keys))
-
-        for key in missing_keys:
-            data[key] = add_default_values_to_missing_keys(data=data.get(key, {}), schema=schema.get("properties", {}).get(key, {}), key=key)
+        for key, (sub_children, value) in _get_defaults_template(schema).items():
+            if key not in data:
+                data[key] = value if sub_children is None else _fill_defaults_template(sub_children)
     elif schema.get("type") == "object":
         data[key] = default_values
     else:
@@ -579,12 +752,13 @@ def load_json_file_2_dict(json_file: str | Path, comment_remove: bool=True, expa
         dict: a dictionary generated from the json file
     """
     try:
-        with open(json_file, 'r', encoding="utf-8") as f:
-            line = re.sub(u'[\u201c\u201d]', '"', f.read())  # read and convert all the fancy quotes to neutral quotes
-            line = re.sub(u'[\u2018\u2019]', "\'", line)  # read and convert all the open/close quotes to neutral quotes
-            # if comment_remove:
-            #     line = remove_comments(line)
-            return json.loads(line) #if not expand_path else expand_path_vars(json.loads(line))
+        with open(json_file, 'rb', buffering=0) as f:  # read whole in one go, a buffer would only add a copy
+            line = f.read()
+        if b"\xe2\x80" in line:  # utf-8 lead bytes of the fancy quotes, only decode and convert them if there might be some
+            line = line.decode("utf-8").translate(_smart_quote_table)
+        # if comment_remove:
+        #     line = remove_comments(line)
+        return orjson.loads(line) if orjson else json.loads(line) #if not expand_path else expand_path_vars(json.loads(line))
     except json.decoder.JSONDecodeError as ex_data:
         # if fix:
         #     return fix_json_decode_error(line, ex_data, expand_path, log=log)
@@ -610,12 +784,10 @@ def load_json(to_load: str | dict | Path) -> dict:
     json_data = {}
     if isinstance(to_load, dict):
         json_data = to_load
-    elif (isinstance(to_load, str) and '{' not in to_load) or isinstance(to_load, Path):
-        to_load = safe_path(to_load)
-        if os.path.exists(to_load) and str(to_load).endswith(".json"):
-            json_data = load_json_file_2_dict(to_load)
+    elif isinstance(to_load, (str, Path)) and f"{to_load}".endswith(".json") and os.path.isfile(to_load):
+        json_data = load_json_file_2_dict(safe_path(to_load, relative=False))  # only pay for safe_path on a real file
     elif isinstance(to_load, str) and '{' in to_load:
-        json_data = json.loads(to_load)
+        json_data = orjson.loads(to_load) if orjson else json.loads(to_load)
     try:
         is_sanitized = sanitize_dict(json_data) # FIXME add back in after fixing RegExStr to use for keys
     except Exception as sanitization_exe:
@@ -639,24 +811,29 @@ def load_space_delimited_file(to_load: str | Path, headers=None, header_line=0,
     Returns:
         dict: a loaded and sanitized dict if the sanitization check indicates the loaded data is valid otherwise returns an empty dictionary
     """
-    content = open(to_load, 'r').readlines()
     table = dict()
-    if not headers:
-        headers = [re.sub(RegexStrings.FriendlyName, '', h).strip() for h in re.split(RegexStrings.SpaceDelimiter, content[header_line].strip('\n').strip())]
-        item_count = len(headers)
-    else:
-        header_line = -1
+    remove_ansi = RegexPatterns.AnsiEscapes.sub  # bound once, these run for every row
+    split_row = RegexPatterns.SpaceDelimiter.split
+    remove_unfriendly = RegexPatterns.FriendlyName.sub
+    with open(to_load, 'r') as content:  # read the rows as they're used instead of holding every line in a list
+        if not headers:
+            header_row = next(islice(content, header_line, None))  # leaves content at the first row after the headers
+            headers = [remove_unfriendly('', h).strip() for h in split_row(header_row.strip('\n').strip())]
         item_count = len(headers)
-    for i, row in enumerate(content[header_line+1:]):
-        row = re.sub(RegexStrings.AnsiEscapes, '', row).strip('\n').strip()  # remove formatting (colors, newlines, and extra spaces)
-        if row == '':
-            continue
-        row_data = re.split(RegexStrings.SpaceDelimiter, row)
-        assert item_count == len(row_data), f"Data in row {i} of file {to_load} does not match headers"
-        name = f"{re.sub(RegexStrings.FriendlyName, '', row_data[0])}"
-        if use_hashes:
-            name += f"_{str(hash(str(row_data)))[-4:]}"
-        table[name.strip()] = {k: re.sub(RegexStrings.FriendlyName, '', v).strip() for k, v in zip(headers, row_data)}
+        for i, row in enumerate(content):
+            if "\x1b" in row:  # only run the regex when there are escape sequences to remove
+                row = remove_ansi('', row)
+            row = row.strip('\n').strip()  # remove formatting (colors, newlines, and extra spaces)
+            if row == '':
+                continue
+            row_data = split_row(row)
+            if item_count != len(row_data):  # still checked when running with -O
+                raise AssertionError(f"Data in row {i} of file {to_load} does not match headers")
+            name = remove_unfriendly('', row_data[0])
+            if use_hashes:
+                row_hash = zlib.crc32("\x1f".join(row_data).encode()) % 10000  # 4 digits to match Hashed_Host, stable across runs
+                name += f"_{row_hash:04d}"
+            table[name.strip()] = {k: remove_unfriendly('', v).strip() for k, v in zip(headers, row_data)}
     return table if sanitize_dict(table) else {}
 
 
@@ -1,6 +1,5 @@
 import collections
 import functools
-import inspect
 import json
 import logging
 import platform
@@ -8,7 +7,6 @@ import sys
 import time
 import jsonschema
 import re
-import os
 from typing import Any, Callable
 
 
@@ -35,31 +33,67 @@ class Const:
         Job_ID = r"^\d{6}_\d_\d_\d_\d{8}"
 
 
+# compiled once at import, Const.Regex keeps the strings for schemas
+# the character classes are repeated so sanitize can check the whole string with fullmatch
+_ALPHA_NUMERIC_RE = re.compile(f"{Const.Regex.AlphaNumeric}+")
+_VARIABLE_RE = re.compile(f"{Const.Regex.Variable}+")
+_PATH_LIKE_RE = re.compile(f"{Const.Regex.PathLike}+")
+_SANITIZE_PATTERNS = {Const.Regex.AlphaNumeric: _ALPHA_NUMERIC_RE, Const.Regex.Variable: _VARIABLE_RE, Const.Regex.PathLike: _PATH_LIKE_RE}
+# the Block patterns in one alternation, so sanitize scans for all of them at once
+_BLOCK_NO_COMMENT_RE = re.compile(f"(?i:{Const.Regex.BlockDrop.removeprefix('(?i)')}|{Const.Regex.BlockDelete.removeprefix('(?i)')})")
+_BLOCK_ALL_RE = re.compile(f"{_BLOCK_NO_COMMENT_RE.pattern}|{Const.Regex.BlockSqlComment}")
+
+
 def exception_decorator(func: Callable, logger: logging.Logger) -> Callable:
     """
     wraps a function in an exception handler to log that it failed
 
     Args:
         func (Callable): function to wrap
+        logger (logging.Logger): logger to report the failure to, printed if None
 
     Returns:
         Callable: wrapped function
     """
+    write = logger.error if logger else print
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         try:
-            ret = func(*args, **kwargs)
-            return ret
+            return func(*args, **kwargs)
         except Exception as e:
-            # logger.error(f"Method failed: {e}")
-            print(f"Method failed: {e}")
-            raise e
+            write(f"Method failed: {e}")
+            raise  # re-raise as is, keeping the original traceback
     return wrapper
 
 
+def _get_running_message(func_name: str) -> str:
+    """
+    Builds the "Running" message for debug_decorator, naming the object and method that called the wrapper if possible
+
+    Args:
+        func_name (str): the name of the decorated function
+
+    Returns:
+        str: the message
+    """
+    try:
+        stack = sys._getframe(2)  # the wrapper's caller, without inspect.stack() building every frame's info
+        # this line uses reflection to get the name of the class that calls this line
+        calling_object = str(stack.f_locals["self"].__class__.__name__)
+        # this line uses reflection to get the name of the function inside the class that calls this line
+        object_function = stack.f_code.co_name
+        # this line uses reflection to get the name of the function that calls this log line
+        return f"Running {func_name} in {calling_object}.{object_function}"
+    except Exception as class_exception:  # failed to get the class name that called this method. oh well
+        return f"Running {func_name}"
+
+
 def debug_decorator(func: Callable) -> Callable:
     """
     Decorates functions with debug prints and timing functionality (if enabled in the GlobalTriggers class)
+    the triggers are read when decorating, so only the enabled functionality is wrapped around each call
+    and nothing at all is wrapped when both are off. set them before decorating
 
     Args:
         func (function): the function to decorate
@@ -67,53 +101,68 @@ def debug_decorator(func: Callable) -> Callable:
     Returns:
         function: the wrapped function containing the original function with the debug and timing functionality
     """
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        if DebugTriggers.FunctionPrinting:
-            msg = ""
-            func_name = f"{func}"
-            if func_name.startswith("<function"):
-                func_name = func_name.split()[1]
-            try:
-                stack = inspect.stack()[1]
-            except:
-                pass
-            try:
-                # this line uses reflection to get the name of the class that calls this line
-                calling_object = str(stack[0].f_locals["self"].__class__.__name__)
-                # this line uses reflection to get the name of the function inside the class that calls this line
-                object_function = str(stack[3])
-                # this line uses reflection to get the name of the function that calls this log line
-                msg = f"Running {func_name} in {calling_object}.{object_function}"
-            except Exception as class_exception:  # failed to get the class name that called this method. oh well
-                msg = f"Running {func_name}"
+    printing = DebugTriggers.FunctionPrinting
+    timing = DebugTriggers.Timing
+    if not printing and not timing:
+        return func
+    func_name = f"{func}"
+    if func_name.startswith("<function"):
+        func_name = func_name.split()[1]
+    perf_counter_ns = time.perf_counter_ns  # closure variable, no module attribute lookups per call
+
+    if printing and timing:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            msg = _get_running_message(func_name)
             print(msg)
-        if DebugTriggers.Timing:
-            start_time = time.perf_counter()
-        ret = func(*args, **kwargs)
-        if DebugTriggers.Timing:
-            end_time = time.perf_counter()
-            run_time = end_time - start_time
+            start_time = perf_counter_ns()
+            ret = func(*args, **kwargs)
+            end_time = perf_counter_ns()
+            run_time = (end_time - start_time) / 1e9
             print(f"Finished {func.__name__!r} in {run_time:.4f} secs")
-        if DebugTriggers.FunctionPrinting:
             print(f"Done r{msg[1:]}")
-        return ret
+            return ret
+    elif printing:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            msg = _get_running_message(func_name)
+            print(msg)
+            ret = func(*args, **kwargs)
+            print(f"Done r{msg[1:]}")
+            return ret
+    else:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start_time = perf_counter_ns()
+            ret = func(*args, **kwargs)
+            end_time = perf_counter_ns()
+            run_time = (end_time - start_time) / 1e9
+            print(f"Finished {func.__name__!r} in {run_time:.4f} secs")
+            return ret
 
     return wrapper
 
 
 def decorate_all_methods(decorator: Callable, *args, **kwargs) -> Callable:
     """
-    Decorates all the methods in a class (includes static methods)
+    Decorates all the methods in a class (includes static and class methods)
+    properties, nested classes, and dunder methods are left alone
 
     Args:
         decorator (function): the decorator to apply to the methods
     """
     def decorate(cls):
-        for attr in cls.__dict__:
-            gattr = getattr(cls, attr)
-            if callable(gattr):
-                setattr(cls, attr, decorator(gattr, *args, **kwargs))
+        from inspect import getattr_static, isfunction
+        for attr in list(cls.__dict__):
+            if attr.startswith("__") and attr.endswith("__"):
+                continue  # called by the interpreter, e.g. __repr__ or __init_subclass__
+            value = getattr_static(cls, attr)  # the descriptor itself, getattr would bind it or unwrap it
+            if isinstance(value, (staticmethod, classmethod)):
+                if isfunction(value.__func__):
+                    # wrap the function underneath so it keeps its binding
+                    setattr(cls, attr, type(value)(decorator(value.__func__, *args, **kwargs)))
+            elif isfunction(value):  # skips properties, nested classes, and other callable objects
+                setattr(cls, attr, decorator(value, *args, **kwargs))
         return cls
     return decorate
 
@@ -136,27 +185,42 @@ def client_decorator(func: Callable) -> Callable:
     return wrapper
 
 class RegexValidator():
-    def validate(self, instance: dict or bool) -> dict:
-        def sub_validate(sub_instance):
+    def validate(self, instance: dict or bool) -> None:
+        """
+        Checks every key and value in an instance is sanitary
+
+        Args:
+            instance (dict or bool): a json-like object to check, generally a dict
+
+        Raises:
+            jsonschema.ValidationError: a key or value is not sanitary
+        """
+        self._walk(instance)
+
+    def _walk(self, instance: dict or bool) -> None:
+        sanitize = self.sanitize  # bound once for the whole walk
+        stack = [instance]  # no recursion, so deep instances don't cost a frame per level
+        while stack:
+            sub_instance = stack.pop()
             if isinstance(sub_instance, dict):
                 for k, v in sub_instance.items():
-                    if not self.sanitize(f"{k}", Const.Regex.Variable):  # allow letters, numbers, and underscores only in keys
+                    if not sanitize(f"{k}", _VARIABLE_RE):  # allow letters, numbers, and underscores only in keys
                         raise jsonschema.ValidationError(f"Key {k} is not sanitary!")
-                    sub_validate(v)
+                stack.extend(reversed(sub_instance.values()))
             elif isinstance(sub_instance, list):
-                for item in sub_instance:
-                    sub_validate(item)
+                stack.extend(reversed(sub_instance))
             else:
-                if not self.sanitize(f"{sub_instance}", Const.Regex.PathLike):  # allow anything that's allowed in a path in a variable
+                if not sanitize(f"{sub_instance}", _PATH_LIKE_RE):  # allow anything that's allowed in a path in a variable
                     raise jsonschema.ValidationError(f"Value {sub_instance} is not sanitary!")
-        return sub_validate(instance)
 
-    def sanitize(self, data, regex_string=Const.Regex.AlphaNumeric, double_dash_exempt=False):
-        match = re.match(regex_string, data)
-        block_drop = re.match(Const.Regex.BlockDrop, data)
-        block_delete = re.match(Const.Regex.BlockDelete, data)
-        block_sql = None if double_dash_exempt else re.match(Const.Regex.BlockSqlComment, data)
-        return match and not block_drop and not block_sql and not block_delete
+    def sanitize(self, data, regex_string: str | re.Pattern = _ALPHA_NUMERIC_RE, double_dash_exempt=False):
+        if isinstance(regex_string, re.Pattern):
+            regex = regex_string
+        else:
+            regex = _SANITIZE_PATTERNS.get(regex_string) or re.compile(regex_string)
+        match = regex.fullmatch(data)  # every character has to be allowed, not just the first
+        block = _BLOCK_NO_COMMENT_RE if double_dash_exempt else _BLOCK_ALL_RE
+        return bool(match) and not block.search(data)  # blocked anywhere in the string, not only at the start
 
 
 def register_name(name: str, registry: dict) -> Callable:
@@ -174,23 +238,22 @@ def register_name(name: str, registry: dict) -> Callable:
     return _register
 
 
-def register_idx(idx: str, registry: set or list, default:Any = None) -> Callable:
+def register_idx(idx: int, registry: list, default:Any = None) -> Callable:
     """
     Registers a function in the registry provided
 
     Args:
-        name (string): step name
-        registry (set): set to register the function in
+        idx (int): the position to register the function at
+        registry (list): list to register the function in, padded with default up to idx
+        default (Any, optional): the value for unregistered positions. Defaults to None.
     Returns the wrapped function
     """
     def _register(func):
-        for i in range(len(registry), idx+1):
-            if isinstance(registry, set):
-                registry.add(default)
-            elif isinstance(registry, list):
-                registry.append(default)
-            else:
-                raise Exception(f"Uncertain how to append items to {type(registry)}!")
+        if not isinstance(registry, list):  # sets can't be indexed, so they could never be registered in
+            raise Exception(f"Uncertain how to register items by index in {type(registry)}!")
+        missing = idx + 1 - len(registry)
+        if missing > 0:
+            registry.extend([default] * missing)
         registry[idx] = func
         return func
     return _register
@@ -263,6 +326,28 @@ class Schemas:
     }
 
 
+_schema_validators = {}  # id(schema): (schema, validator) for each schema custom_schema_validation has seen
+
+
+def _schema_validator(schema: dict) -> jsonschema.protocols.Validator:
+    """
+    Gets the validator custom_schema_validation uses for a schema
+    the server checks every request against the same schema dicts (e.g. ServerSchemas.Command), so each one is built once
+
+    Args:
+        schema (dict): the schema to validate against
+
+    Returns:
+        jsonschema.protocols.Validator: the validator for the schema
+    """
+    entry = _schema_validators.get(id(schema))
+    if entry is None or entry[0] is not schema:  # new schema, or a new dict that was given a freed schema's id
+        validator_class = jsonschema.validators.validator_for(schema)
+        validator_class.check_schema(schema)  # jsonschema.validate checked the schema on every call, a bad one still fails here
+        entry = _schema_validators[id(schema)] = (schema, validator_class(schema))
+    return entry[1]
+
+
 def custom_schema_validation(instance: dict or bool, schema: dict) -> None:
     """
     Wraps the jsonschma's validate function with some better error handling, especially useful in the case of custom error messages
@@ -275,31 +360,52 @@ def custom_schema_validation(instance: dict or bool, schema: dict) -> None:
         SchemaValidationError: error validating the schema
     """
     try:
-        jsonschema.validate(instance, schema)
+        error = jsonschema.exceptions.best_match(_schema_validator(schema).iter_errors(instance))  # same error jsonschema.validate picks
+        if error is not None:
+            raise error
     except Exception as validation_exception:
-        err = f"{validation_exception}"
         instance_str = f"{instance}"
         if len(instance_str) > 32:  # need to shrink this down
             instance_str = f"{instance_str[:32]}..."
-        if "error message" in err:
-            err_start = err.find("error message")+15
-            err = err[err_start:]
-            err_end = err.find("\n", err_start)
-            err = err[:err_end]
-            pattern_str = ""
-            if "'pattern'" in err:
-                pattern_start = err.find("'pattern'")
-                pattern = err[pattern_start+11:].strip()
-                err = err[:pattern_start].strip()
-                pattern_str = f"\nUse regex pattern: {pattern}"
+        error_schema = getattr(validation_exception, "schema", None)  # the part of the schema that failed, rather than parsing the error text
+        err = error_schema.get("error message") if isinstance(error_schema, dict) else None
+        if err:
+            pattern = error_schema.get("pattern")
+            pattern_str = f"\nUse regex pattern: {pattern}" if pattern else ""
             raise SchemaValidationError(f"Error validating {instance_str} because {err}{pattern_str}")
         else:
-            raise SchemaValidationError(f"Error validating {instance_str}\n{err}")
+            raise SchemaValidationError(f"Error validating {instance_str}\n{validation_exception}")
+
+
+_JSON_PRIMITIVES = frozenset((str, int, float, bool, type(None)))
+
+
+def _jsonify_value(value: Any) -> Any:
+    """
+    Converts a single value into something json-like, without looking inside dicts or lists
+
+    Args:
+        value (Any): object to convert
+
+    Returns:
+        Any: a list for tuples, the to_json() output for objects that have it, otherwise the value itself
+    """
+    while True:
+        if isinstance(value, (dict, list)):
+            return value
+        elif isinstance(value, tuple):
+            value = list(value)
+        elif hasattr(value, "to_json"):
+            value = value.to_json()
+        else:
+            return value
 
 
 def jsonify(jsondata: Any) -> Any:
     """
     Attempts to convert any non-json-compatible types into something analagous
+    dicts and lists are updated in place, walking them with a stack so deep data doesn't hit the recursion limit
+    a dict or list that contains itself raises ValueError rather than walking forever
 
     Args:
         jsondata (Any): object to convert
@@ -307,31 +413,44 @@ def jsonify(jsondata: Any) -> Any:
     Returns:
         Any: json-like object
     """
-    if isinstance(jsondata, dict):
-        for k, v in jsondata.items():
-            jsondata[k] = jsonify(v)
-    elif isinstance(jsondata, list):
-        for i, e in enumerate(jsondata):
-            jsondata[i] = jsonify(e)
-    elif isinstance(jsondata, tuple):
-        return jsonify(list(jsondata))
-    else:
-        if hasattr(jsondata, "to_json"):
-            return jsonify(jsondata.to_json())
+    jsondata = _jsonify_value(jsondata)
+    if not isinstance(jsondata, (dict, list)):
+        return jsondata
+
+    def items(container):
+        return iter(container.items()) if isinstance(container, dict) else enumerate(container)
+
+    stack = [(jsondata, items(jsondata))]  # (container, its items left to walk) from the top down to the current one
+    on_stack = {id(jsondata)}  # a container shared by two branches is fine, one that contains itself is a cycle
+    while stack:
+        container, remaining = stack[-1]
+        for k, v in remaining:
+            if type(v) in _JSON_PRIMITIVES:  # already json, nothing to write back
+                continue
+            converted = _jsonify_value(v)
+            if converted is not v:
+                container[k] = converted
+            if isinstance(converted, (dict, list)):
+                if id(converted) in on_stack:
+                    raise ValueError("Circular reference detected")  # same error json.dumps gives
+                on_stack.add(id(converted))
+                stack.append((converted, items(converted)))
+                break  # walk the child, then pick this container back up where it left off
+        else:
+            stack.pop()
+            on_stack.discard(id(container))
     return jsondata
 
 
 def get_caller_name(layers=0):
-    func_name = f"{inspect.stack()[layers][3]}"
-    try:
-        stack = inspect.stack()[layers+1]
-    except:
-        pass
+    frame = sys._getframe(layers)  # jump straight to the frame, inspect.stack() reads source lines for every frame
+    func_name = frame.f_code.co_name
+    stack = frame.f_back
     try:
         # this line uses reflection to get the name of the class that calls this line
-        calling_object = str(stack[0].f_locals["self"].__class__.__name__)
+        calling_object = str(stack.f_locals["self"].__class__.__name__)
         # this line uses reflection to get the name of the function inside the class that calls this line
-        object_function = str(stack[3])
+        object_function = stack.f_code.co_name
         # this line uses reflection to get the name of the function that calls this log line
         return f"{func_name} in {calling_object}.{object_function}"
     except Exception as class_exception:  # failed to get the class name that called this method. oh well
@@ -339,16 +458,8 @@ def get_caller_name(layers=0):
 
 
 def GetLogFormatter() -> logging.Formatter:
-    class CustomFormatter(logging.Formatter):
-        def custom_formatting_method(string):
-            items = string.split("||")
-            items = items[:2] + [get_caller_name(10)] +  items[2:]
-            return " || ".join(items)
-
-        def format(self, record):
-            default_formatted = logging.Formatter.format(self, record)
-            return CustomFormatter.custom_formatting_method(default_formatted)
-    return CustomFormatter(f"%(asctime)s||%(levelname)5s||%(message)s")
+    # the record already knows where it was logged from, so the caller comes from its fields instead of a walk up the stack
+    return logging.Formatter(f"%(asctime)s || %(levelname)5s || %(funcName)s in %(module)s:%(lineno)d || %(message)s")
 
 
 def GetConsoleLogHandler() -> logging.StreamHandler:
@@ -361,18 +472,24 @@ class TailLogHandler(logging.Handler):
     def __init__(self, log_queue):
         logging.Handler.__init__(self)
         self.log_queue = log_queue
+        self.emitted = 0  # lets readers tell whether the queue changed since they last looked
 
     def emit(self, record):
         self.log_queue.append(self.format(record))
+        self.emitted += 1
 
 
 class TailLogger(object):
     def __init__(self, maxlen):
         self._log_queue = collections.deque(maxlen=maxlen)
         self._log_handler = TailLogHandler(self._log_queue)
+        self._contents = (0, "")  # (emitted count, joined lines), polling is more frequent than logging
 
     def contents(self):
-        return '\n'.join(self._log_queue)
+        emitted = self._log_handler.emitted
+        if self._contents[0] != emitted:
+            self._contents = (emitted, '\n'.join(self._log_queue))
+        return self._contents[1]
 
     @property
     def log_handler(self):
@@ -380,40 +497,37 @@ class TailLogger(object):
 
 
 def generate_docs(d, file_str):
-    os.system(f"python -m pdoc --html --output-dir {d} {file_str} --force")
+    import subprocess
+    # no shell, so paths with spaces or quotes are passed through as they are
+    subprocess.run([sys.executable, "-m", "pdoc", "--html", "--output-dir", d, file_str, "--force"])
 
 
+@functools.cache
 def get_platform():
-    return str(platform.system()).lower()
+    return str(platform.system()).lower()  # can't change while running
+
+
+_resolved_ip = None  # the local ip doesn't change while running, so it is only worked out once
 
 
 def resolve_ip(logger=None):
+    global _resolved_ip
+    if _resolved_ip is not None:
+        return _resolved_ip
     import socket
-    host = "proxy-chain.intel.com"
-    port = 911
     try:
-        s = socket.socket()
-        s.settimeout(1)  # one second timeout so we don't hinder functionality
-        try:
-            s.connect(("intel.com", 80))  # website ip and port
-            return s.getsockname()[0]
-        except socket.timeout:
-            s.connect((host, port))
-        s.close()
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            # connecting a udp socket sends nothing, it just makes the os pick the interface (and ip) it would route through
+            s.connect(("8.8.8.8", 80))
+            _resolved_ip = s.getsockname()[0]
+            return _resolved_ip
     except socket.error as socket_error:
-        try:
-            s.close()
-        except:
-            # socket doesn't exist so we can't close it. this is not a problem though
-            pass
         try:
             import subprocess
-            if "linux" in get_platform():
-                cmd = "hostname -i | awk '{print $1}'"
-            else:
-                cmd = "hostname -I | awk '{print $1}'"
-            ip = subprocess.check_output(cmd.split(' ')).decode("utf-8").lower().strip()
+            flag = "-i" if "linux" in get_platform() else "-I"
+            ip = subprocess.check_output(["hostname", flag]).decode("utf-8").lower().split()[0]  # first address, no awk needed
             if ip.count('.') == 3:
+                _resolved_ip = ip
                 return ip
         except Exception as e:
             msg = f"Error during ip acquisition: {e}, after {socket_error}"
@@ -8,6 +8,7 @@ This could be abstracted into Task/Event classes that have more information and
 """
 
 import multiprocessing
+import os
 import time
 import queue
 import random
@@ -16,17 +17,30 @@ global_timeout = 20
 
 
 class StateDef:
-    Starting = "starting"
-    Running = "running"
-    Stop = "stop"
-    Stopping = "stopping"
-    Dead = "dead"
+    # ints in lifecycle order, so "still running" is a single comparison
+    Starting = 0
+    Running = 1
+    Stopping = 2
+    Stop = 3
+    Dead = 4
 
 
 class StateManager:
+    __slots__ = ("_state",)
+
     def __init__(self):
+        # shared memory, so a state change in one process is seen by all of them instead of only its own copy
+        self._state = multiprocessing.Value("i", StateDef.Starting, lock=False)  # a single int write needs no lock
         self.start()
 
+    @property
+    def state(self):
+        return self._state.value
+
+    @state.setter
+    def state(self, state):
+        self._state.value = state
+
     def start(self):
         self.state = StateDef.Starting
 
@@ -49,7 +63,7 @@ class StateManager:
         return self.state == StateDef.Dead
 
     def should_run(self):
-        return not self.state == StateDef.Stop and not self.state == StateDef.Stopping
+        return self.state < StateDef.Stopping
 
     def should_cleanup(self):
         return self.state == StateDef.Stopping
@@ -63,19 +77,33 @@ class Command:
         self.state = state
 
 class CentralizedLogger:
-    def __init__(self, global_state):
+    def __init__(self, global_state, flush_every=32):
         self.log = multiprocessing.Queue()
         self.global_state = global_state
+        self.flush_every = flush_every  # messages go over the queue in batches, one put per batch
+        self._buffer = []
+        self._buffer_pid = os.getpid()
 
     def print(self, msg):
         print(msg)
-        self.log.put(msg)
+        if self._buffer_pid != os.getpid():  # each process buffers its own messages, not a copy of its parent's
+            self._buffer = []
+            self._buffer_pid = os.getpid()
+        self._buffer.append(msg)
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self._buffer and self._buffer_pid == os.getpid():
+            self.log.put(self._buffer)
+            self._buffer = []
 
     def dump(self):
+        self.flush()
         out = []
         try:
             while not self.global_state.is_stopped():
-                out.append(self.log.get(False))
+                out.extend(self.log.get(False))
         except queue.Empty as e:
             pass
         return out
@@ -85,9 +113,11 @@ class EventClass(object):
     def __init__(self, name):
         self.name = name
     
-    def do_something(self, log):
+    def do_something(self, log, worker_name=None):
         try:
-            log.print(f'Doing {self.name} in {multiprocessing.current_process().name}!')
+            if worker_name is None:
+                worker_name = multiprocessing.current_process().name
+            log.print(f'Doing {self.name} in {worker_name}!')
         except Exception as do_exc:
             log.print(f"woops: {do_exc}")
 
@@ -95,27 +125,31 @@ class EventClass(object):
 def work_process(s, l, q, o=None):
     print("Worker starting")
     timeout = global_timeout
+    worker_name = multiprocessing.current_process().name  # doesn't change, so look it up once rather than per task
     while timeout and s.should_run():
         try:
-            if not q.empty():
-                obj = q.get()
-                if isinstance(obj, str):
-                    l.print(obj)
-                elif isinstance(obj, Command):
-                    print("Setting worker state")
-                    s.set_state(obj.state)
-                else:
-                    obj.do_something(l)
-            else:
-                if not timeout%5:  # 5 runs in a row will show nothing to do
+            obj = q.get(timeout=0.5)  # sleeps until something arrives instead of polling empty() every half second
+        except queue.Empty:
+            try:
+                if not timeout%5:  # 5 waits in a row with nothing to do
                     l.print("Worker has nothing to do")
                     if o:
-                        o.put(f"{multiprocessing.current_process().name} is bored")
-
+                        o.put(f"{worker_name} is bored")
+            except Exception as work_exc:
+                l.print(f"oh no: {work_exc}")
+            timeout -= 1  # only idle time counts towards giving up
+            continue
+        try:
+            if isinstance(obj, str):
+                l.print(obj)
+            elif isinstance(obj, Command):
+                print("Setting worker state")
+                s.set_state(obj.state)
+            else:
+                obj.do_something(l, worker_name)
         except Exception as work_exc:
             l.print(f"oh no: {work_exc}")
-        timeout -= 1
-        time.sleep(0.5)
+    l.flush()  # send whatever is still buffered before the process ends
 
 
 def management_process(s, l, q, o1, o2):
@@ -123,28 +157,28 @@ def management_process(s, l, q, o1, o2):
     timeout = global_timeout
     while timeout and s.should_run():
         try:
-            if not q.empty():
-                obj = q.get()
-                if isinstance(obj, Command):
-                    print("Setting management state")
-                    s.set_state(obj.state)
-                if "bored" in obj:
-                    if "Process-1" in obj:
-                        o1.put(EventClass(f'task {random.random()}'))
-                    elif "Process-2" in obj:
-                        o2.put(EventClass(f'task {random.random()}'))
-                    else:
-                        l.print("Unexpected worker!")
+            obj = q.get(timeout=0.5)  # sleeps until something arrives instead of polling empty() every half second
+        except queue.Empty:
+            if not timeout%5:  # 5 waits in a row with nothing to do
+                l.print("Manager has nothing to do")
+            timeout -= 1  # only idle time counts towards giving up
+            continue
+        try:
+            if isinstance(obj, Command):
+                print("Setting management state")
+                s.set_state(obj.state)
+            if "bored" in obj:
+                if "Process-1" in obj:
+                    o1.put(EventClass(f'task {random.random()}'))
+                elif "Process-2" in obj:
+                    o2.put(EventClass(f'task {random.random()}'))
                 else:
-                    l.print("Unexpected message!")
+                    l.print("Unexpected worker!")
             else:
-                if not timeout%5:  # 5 runs in a row will show nothing to do
-                    l.print("Manager has nothing to do")
-
+                l.print("Unexpected message!")
         except Exception as work_exc:
             l.print(f"oh no: {work_exc}")
-        timeout -= 1
-        time.sleep(0.5)
+    l.flush()  # send whatever is still buffered before the process ends
 
 
 if __name__ == "__main__":